@@ -2,16 +2,19 @@
 Configuration — loads environment variables with sensible defaults.
 """
 
+import functools
 import os
 import pathlib
-from dataclasses import dataclass, field
-from typing import List
+from dataclasses import dataclass
+from typing import Tuple
 
-from dotenv import load_dotenv
-
-# Load .env from project root (two levels up from this file)
+# Load .env from project root (two levels up from this file), unless the
+# environment is already provided (e.g. docker compose env_file)
 _PROJECT_ROOT = pathlib.Path(__file__).resolve().parent.parent
-load_dotenv(_PROJECT_ROOT / ".env")
+if os.getenv("SKIP_DOTENV") != "1":
+    from dotenv import load_dotenv
+
+    load_dotenv(_PROJECT_ROOT / ".env")
 
 
 @dataclass(frozen=True)
@@ -27,28 +30,36 @@ class Settings:
     output_dir: str = "output"
 
     # --- Scraping --------------------------------------------------------
-    subreddits: List[str] = field(default_factory=list)
+    subreddits: Tuple[str, ...] = ()
     subs_per_run: int = 4
     min_score: int = 300
     max_score: int = 10000
     max_stories_per_run: int = 5
+    max_concurrency: int = 4  # Reddit requests in flight at once
+    fetch_deadline_s: int = 30  # per feed, retries included
 
     # --- Story generation ------------------------------------------------
     story_word_count: int = 140
+    # gpt-4o-mini usability score (0–10) a post needs before GPT-4o runs
+    screen_min_score: int = 6
 
     # --- Bright Data endpoint --------------------------------------------
     brightdata_endpoint: str = "https://api.brightdata.com/request"
 
 
+@functools.lru_cache(maxsize=1)
 def load_settings() -> Settings:
-    """Build a Settings instance from environment variables."""
+    """
+    Build a Settings instance from environment variables.
+    Cached: the environment is read once per process.
+    """
     subreddits_raw = os.getenv(
         "SUBREDDITS",
         "UnresolvedMysteries,HighStrangeness,TheGrittyPast,OddlyTerrifying,"
         "LetsNotMeet,TrueCrimeDiscussion,Paranormal,Glitch_in_the_Matrix,"
         "CreepyWikipedia,Thetruthishere,RBI,Humanoidencounters",
     )
-    subreddits = [s.strip() for s in subreddits_raw.split(",") if s.strip()]
+    subreddits = tuple(s.strip() for s in subreddits_raw.split(",") if s.strip())
 
     return Settings(
         openai_api_key=os.getenv("OPENAI_API_KEY", ""),
@@ -62,5 +73,8 @@ def load_settings() -> Settings:
         min_score=int(os.getenv("MIN_SCORE", "300")),
         max_score=int(os.getenv("MAX_SCORE", "10000")),
         max_stories_per_run=int(os.getenv("MAX_STORIES_PER_RUN", "5")),
+        max_concurrency=int(os.getenv("MAX_CONCURRENCY", "4")),
+        fetch_deadline_s=int(os.getenv("FETCH_DEADLINE_S", "30")),
         story_word_count=int(os.getenv("STORY_WORD_COUNT", "140")),
+        screen_min_score=int(os.getenv("SCREEN_MIN_SCORE", "6")),
     )
@@ -2,56 +2,217 @@
 SQLite database layer — story storage and deduplication.
 """
 
-import json
 import sqlite3
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 
+import orjson
 
-def _connect(db_path: str) -> sqlite3.Connection:
-    """Return a connection with row-factory set to dict-like rows."""
-    path = Path(db_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(str(path))
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")  # better concurrent reads
+
+# One shared connection per database file, opened lazily on first use.
+_CONN_CACHE: Dict[str, sqlite3.Connection] = {}
+_CONN_LOCK = threading.Lock()
+# Serialises execute+commit pairs; WAL lets readers run without it.
+_WRITE_LOCK = threading.Lock()
+
+# Applied once per connection, right after it is opened.
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # better concurrent reads
+    "PRAGMA synchronous=NORMAL",  # WAL stays consistent, fewer fsyncs
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-64000",  # 64 MB page cache
+    "PRAGMA mmap_size=268435456",  # 256 MB memory-mapped reads
+    "PRAGMA busy_timeout=5000",  # wait instead of "database is locked"
+)
+
+# reddit_ids already stored, per database: loaded once, then kept in sync by
+# insert_stories, so dedup checks never touch SQLite. Rows inserted by another
+# process after loading are not seen (the UNIQUE constraint still applies).
+_SEEN: Dict[str, Set[str]] = {}
+
+# Run PRAGMA optimize after this many inserts (and on shutdown).
+_OPTIMIZE_EVERY = 100
+_inserts_since_optimize = 0
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    Return the shared connection (dict-like rows) for this database, opening
+    and tuning it on first use. Every function below goes through it, so
+    callers keep passing `db_path`.
+    """
+    conn = _CONN_CACHE.get(db_path)
+    if conn is not None:
+        return conn
+    with _CONN_LOCK:
+        conn = _CONN_CACHE.get(db_path)
+        if conn is None:
+            path = Path(db_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            for pragma in _PRAGMAS:
+                conn.execute(pragma)
+            _CONN_CACHE[db_path] = conn
     return conn
 
 
+def close_all() -> None:
+    """Close every cached connection (call once on shutdown)."""
+    with _CONN_LOCK:
+        for conn in _CONN_CACHE.values():
+            conn.execute("PRAGMA optimize")
+            conn.close()
+        _CONN_CACHE.clear()
+        _SEEN.clear()
+
+
+def _seen_ids(db_path: str) -> Set[str]:
+    """Return the in-memory set of stored reddit_ids, loading it on first use."""
+    seen = _SEEN.get(db_path)
+    if seen is None:
+        conn = connect(db_path)
+        with _WRITE_LOCK:
+            seen = _SEEN.get(db_path)
+            if seen is None:
+                seen = {r[0] for r in conn.execute("SELECT reddit_id FROM stories")}
+                _SEEN[db_path] = seen
+    return seen
+
+
+def _note_inserts(conn: sqlite3.Connection, count: int) -> None:
+    """Refresh planner statistics every _OPTIMIZE_EVERY inserts (write lock held)."""
+    global _inserts_since_optimize
+    _inserts_since_optimize += count
+    if _inserts_since_optimize >= _OPTIMIZE_EVERY:
+        conn.execute("PRAGMA optimize")
+        _inserts_since_optimize = 0
+
+
 def init_db(db_path: str) -> None:
-    """Create the stories table if it doesn't exist."""
-    conn = _connect(db_path)
-    conn.execute(
-        """
-        CREATE TABLE IF NOT EXISTS stories (
-            id              INTEGER PRIMARY KEY AUTOINCREMENT,
-            reddit_id       TEXT    UNIQUE NOT NULL,
-            subreddit       TEXT    NOT NULL,
-            title           TEXT    NOT NULL,
-            url             TEXT    NOT NULL,
-            score           INTEGER NOT NULL DEFAULT 0,
-            selftext        TEXT    NOT NULL DEFAULT '',
-            script          TEXT,
-            keywords        TEXT,
-            tts_file        TEXT,
-            created_at      TEXT    NOT NULL DEFAULT (datetime('now')),
-            reddit_created  TEXT
+    """Create the stories and rejected_posts tables if they don't exist."""
+    conn = connect(db_path)
+    with _WRITE_LOCK:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS stories (
+                id              INTEGER PRIMARY KEY AUTOINCREMENT,
+                reddit_id       TEXT    UNIQUE NOT NULL,
+                subreddit       TEXT    NOT NULL,
+                title           TEXT    NOT NULL,
+                url             TEXT    NOT NULL,
+                score           INTEGER NOT NULL DEFAULT 0,
+                selftext        TEXT    NOT NULL DEFAULT '',
+                script          TEXT,
+                keywords        TEXT    CHECK (json_valid(keywords)),
+                tts_file        TEXT,
+                created_at      TEXT    NOT NULL DEFAULT (datetime('now')),
+                reddit_created  TEXT
+            )
+            """
         )
-        """
-    )
-    conn.commit()
-    conn.close()
+        # Posts turned down by screening, so later runs don't re-screen them
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS rejected_posts (
+                reddit_id       TEXT    PRIMARY KEY,
+                rejected_at     TEXT    NOT NULL DEFAULT (datetime('now'))
+            )
+            """
+        )
+        conn.commit()
 
 
 def story_exists(db_path: str, reddit_id: str) -> bool:
     """Check if a story with this reddit_id is already stored."""
-    conn = _connect(db_path)
-    row = conn.execute(
-        "SELECT 1 FROM stories WHERE reddit_id = ?", (reddit_id,)
-    ).fetchone()
-    conn.close()
-    return row is not None
+    return reddit_id in _seen_ids(db_path)
+
+
+def existing_reddit_ids(db_path: str, reddit_ids: List[str]) -> Set[str]:
+    """Return the subset of `reddit_ids` already stored (one batch lookup)."""
+    return _seen_ids(db_path).intersection(reddit_ids)
+
+
+def all_reddit_ids(db_path: str) -> Set[str]:
+    """
+    Return every stored reddit_id as a new set, for a caller that tracks
+    additions itself (e.g. across one pipeline run).
+    """
+    return set(_seen_ids(db_path))
+
+
+def mark_rejected(db_path: str, reddit_ids: List[str]) -> None:
+    """Record posts rejected by screening (one transaction, duplicates ignored)."""
+    if not reddit_ids:
+        return
+    conn = connect(db_path)
+    with _WRITE_LOCK:
+        conn.executemany(
+            "INSERT OR IGNORE INTO rejected_posts (reddit_id) VALUES (?)",
+            [(rid,) for rid in reddit_ids],
+        )
+        conn.commit()
+
+
+def rejected_reddit_ids(db_path: str) -> Set[str]:
+    """Return every reddit_id recorded by `mark_rejected`."""
+    conn = connect(db_path)
+    return {r[0] for r in conn.execute("SELECT reddit_id FROM rejected_posts")}
+
+
+# Shared tail of the INSERT statements; RETURNING (SQLite 3.35+) yields the
+# new id, or no row at all when OR IGNORE skipped a duplicate.
+_INSERT_TAIL = """
+    INTO stories
+        (reddit_id, subreddit, title, url, score, selftext,
+         script, keywords, reddit_created)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    RETURNING id
+"""
+_INSERT_SQL = "INSERT" + _INSERT_TAIL
+_INSERT_IF_NEW_SQL = "INSERT OR IGNORE" + _INSERT_TAIL
+
+
+def _story_params(data: Dict) -> tuple:
+    """Build the INSERT parameter tuple for one story dict."""
+    return (
+        data["reddit_id"],
+        data["subreddit"],
+        data["title"],
+        data["url"],
+        data.get("score", 0),
+        data.get("selftext", ""),
+        data.get("script"),
+        orjson.dumps(data.get("keywords", [])).decode(),
+        data.get("reddit_created"),
+    )
+
+
+def _insert_rows(db_path: str, sql: str, rows: List[Dict]) -> List[Optional[int]]:
+    """Run `sql` for each row in one transaction (a single commit); return ids."""
+    if not rows:
+        return []
+    conn = connect(db_path)
+    params = [_story_params(d) for d in rows]
+    ids: List[Optional[int]] = []
+    with _WRITE_LOCK:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for p in params:
+                returned = conn.execute(sql, p).fetchall()
+                ids.append(returned[0][0] if returned else None)
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        inserted = [d["reddit_id"] for d, i in zip(rows, ids) if i is not None]
+        _note_inserts(conn, len(inserted))
+        seen = _SEEN.get(db_path)
+        if seen is not None:
+            seen.update(inserted)
+    return ids
 
 
 def insert_story(db_path: str, data: Dict) -> int:
@@ -62,73 +223,86 @@ def insert_story(db_path: str, data: Dict) -> int:
         reddit_id, subreddit, title, url, score, selftext,
         script, keywords (list), reddit_created (ISO string or None)
     """
-    conn = _connect(db_path)
-    keywords_json = json.dumps(data.get("keywords", []), ensure_ascii=False)
-    cur = conn.execute(
-        """
-        INSERT INTO stories
-            (reddit_id, subreddit, title, url, score, selftext,
-             script, keywords, reddit_created)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            data["reddit_id"],
-            data["subreddit"],
-            data["title"],
-            data["url"],
-            data.get("score", 0),
-            data.get("selftext", ""),
-            data.get("script"),
-            keywords_json,
-            data.get("reddit_created"),
-        ),
-    )
-    conn.commit()
-    story_id = cur.lastrowid
-    conn.close()
-    return story_id
+    return insert_stories(db_path, [data])[0]
+
+
+def insert_stories(db_path: str, rows: List[Dict]) -> List[int]:
+    """
+    Insert several stories in one transaction (a single commit) and
+    return their ids, in the same order as `rows`.
+
+    Each row uses the same keys as `insert_story`.
+    """
+    return _insert_rows(db_path, _INSERT_SQL, rows)
+
+
+def insert_story_if_new(db_path: str, data: Dict) -> Optional[int]:
+    """
+    Insert a story unless its reddit_id is already stored, in one statement.
+    Returns the new id, or None for a duplicate.
+    """
+    return insert_stories_if_new(db_path, [data])[0]
+
+
+def insert_stories_if_new(db_path: str, rows: List[Dict]) -> List[Optional[int]]:
+    """
+    Batch variant of `insert_story_if_new` (a single commit). Returns one id
+    per row, in order, with None for rows that were duplicates.
+    """
+    return _insert_rows(db_path, _INSERT_IF_NEW_SQL, rows)
 
 
 def get_story(db_path: str, story_id: int) -> Optional[Dict]:
     """Retrieve a story by its internal id, or None."""
-    conn = _connect(db_path)
+    conn = connect(db_path)
     row = conn.execute(
         "SELECT * FROM stories WHERE id = ?", (story_id,)
     ).fetchone()
-    conn.close()
     if row is None:
         return None
     d = dict(row)
     # Parse keywords back to list
     if d.get("keywords"):
         try:
-            d["keywords"] = json.loads(d["keywords"])
-        except json.JSONDecodeError:
+            d["keywords"] = orjson.loads(d["keywords"])
+        except orjson.JSONDecodeError:
             d["keywords"] = []
     else:
         d["keywords"] = []
     return d
 
 
+def search_by_keyword(db_path: str, keyword: str) -> List[int]:
+    """Return ids of stories whose keywords contain `keyword` (newest first)."""
+    conn = connect(db_path)
+    rows = conn.execute(
+        "SELECT DISTINCT s.id FROM stories s, json_each(s.keywords) je "
+        "WHERE je.value = ? ORDER BY s.id DESC",
+        (keyword,),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
 def update_tts_path(db_path: str, story_id: int, path: str) -> None:
     """Set the tts_file path for a story."""
-    conn = _connect(db_path)
-    conn.execute(
-        "UPDATE stories SET tts_file = ? WHERE id = ?", (path, story_id)
-    )
-    conn.commit()
-    conn.close()
+    conn = connect(db_path)
+    with _WRITE_LOCK:
+        conn.execute(
+            "UPDATE stories SET tts_file = ? WHERE id = ?", (path, story_id)
+        )
+        conn.commit()
 
 
 def list_stories(
     db_path: str, limit: int = 20, offset: int = 0
-) -> List[Dict]:
-    """Return recent stories (newest first)."""
-    conn = _connect(db_path)
-    rows = conn.execute(
+) -> List[sqlite3.Row]:
+    """
+    Return recent stories (newest first) as sqlite3.Row objects, which
+    support mapping-style access (row["title"]); use dict(row) if needed.
+    """
+    conn = connect(db_path)
+    return conn.execute(
         "SELECT id, reddit_id, subreddit, title, score, tts_file, created_at "
         "FROM stories ORDER BY id DESC LIMIT ? OFFSET ?",
         (limit, offset),
     ).fetchall()
-    conn.close()
-    return [dict(r) for r in rows]
@@ -1,21 +1,46 @@
 """
 Discord webhook notifications — sends production cards and TTS files.
+
+Sends happen on a background worker thread so the pipeline never blocks on
+Discord (timeouts, rate-limit retries). Call `flush()` before exiting.
 """
 
+import functools
 import logging
+import queue
+import threading
+import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional
-
-import requests
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 
 from .config import Settings
 
+if TYPE_CHECKING:
+    # requests is imported lazily, on the worker thread's first send
+    import requests
+
 logger = logging.getLogger(__name__)
 
 # Dark purple/blue theme color
 _EMBED_COLOR = 0x1A1A2E
 
+# Discord limits for a single webhook message
+_MAX_EMBEDS_PER_MESSAGE = 10
+_MAX_EMBED_CHARS_PER_MESSAGE = 6000
+
+# (epoch minute, footer text) — the footer only changes once a minute
+_footer_cache: Tuple[int, str] = (-1, "")
+
+# Pending notifications: (kind, kwargs) consumed by a single daemon worker
+_Q: "queue.Queue[Tuple[str, Dict]]" = queue.Queue()
+_worker_thread: Optional[threading.Thread] = None
+_worker_lock = threading.Lock()
+
+
+# ---------------------------------------------------------------------------
+# Public API — enqueue and return immediately
+# ---------------------------------------------------------------------------
 
 def send_story_card(
     settings: Settings,
@@ -26,16 +51,181 @@ def send_story_card(
     keywords: List[str],
     score: int,
     subreddit: str,
-) -> bool:
+) -> None:
+    """Queue a rich embed "Production Card" for Discord."""
+    _enqueue("card", {
+        "settings": settings,
+        "story_id": story_id,
+        "title": title,
+        "url": url,
+        "script": script,
+        "keywords": keywords,
+        "score": score,
+        "subreddit": subreddit,
+    })
+
+
+def send_tts_file(
+    settings: Settings,
+    story_id: int,
+    title: str,
+    mp3_path: str,
+    voice: str = "onyx",
+    file_bytes: Optional[bytes] = None,
+) -> None:
     """
-    Send a rich embed "Production Card" to Discord.
-    Returns True on success, False on failure.
+    Queue an MP3 upload to Discord via the webhook.
+    Pass `file_bytes` when the audio is already in memory to skip re-reading
+    `mp3_path` (which then only names the attachment).
+    """
+    _enqueue("tts", {
+        "settings": settings,
+        "story_id": story_id,
+        "title": title,
+        "mp3_path": mp3_path,
+        "voice": voice,
+        "file_bytes": file_bytes,
+    })
+
+
+def send_story_cards(settings: Settings, cards: List[Dict]) -> None:
     """
+    Queue several "Production Cards" at once (each a dict of the
+    `send_story_card` arguments minus `settings`). They are sent up to 10
+    embeds per message, fewer when the 6000-character limit would be hit.
+    """
+    if cards:
+        _enqueue("cards", {"settings": settings, "cards": list(cards)})
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """
+    Block until every notification queued so far has been sent.
+    Returns False if `timeout` (seconds) expired first.
+    """
+    done = threading.Event()
+    _enqueue("flush", {"event": done})
+    return done.wait(timeout)
+
+
+# ---------------------------------------------------------------------------
+# Worker
+# ---------------------------------------------------------------------------
+
+def _enqueue(kind: str, kwargs: Dict) -> None:
+    """Put a job on the queue, starting the worker thread if needed."""
+    global _worker_thread
+    with _worker_lock:
+        if _worker_thread is None or not _worker_thread.is_alive():
+            _worker_thread = threading.Thread(
+                target=_worker, name="discord-notify", daemon=True
+            )
+            _worker_thread.start()
+    _Q.put((kind, kwargs))
+
+
+def _worker() -> None:
+    """
+    Send queued notifications one at a time. Successive cards for the same
+    webhook are merged into as few messages as Discord's limits allow.
+    """
+    pending: Optional[Tuple[str, Dict]] = None
+    while True:
+        kind, kwargs = pending if pending is not None else _Q.get()
+        pending = None
+        try:
+            if kind == "flush":
+                kwargs["event"].set()
+            elif kind == "tts":
+                _send_tts_file_sync(**kwargs)
+            elif kind == "cards":
+                _send_cards(**kwargs)
+            else:
+                cards = [_card_fields(kwargs)]
+                while True:
+                    try:
+                        nxt = _Q.get_nowait()
+                    except queue.Empty:
+                        break
+                    nxt_kind, nxt_kwargs = nxt
+                    if (
+                        nxt_kind != "card"
+                        or nxt_kwargs["settings"].discord_webhook_url
+                        != kwargs["settings"].discord_webhook_url
+                    ):
+                        pending = nxt
+                        break
+                    cards.append(_card_fields(nxt_kwargs))
+                _send_cards(kwargs["settings"], cards)
+        except Exception:
+            logger.exception("Discord worker failed on a %s notification", kind)
+
+
+# ---------------------------------------------------------------------------
+# Synchronous senders (run on the worker thread)
+# ---------------------------------------------------------------------------
+
+@functools.lru_cache(maxsize=1)
+def _get_session() -> "requests.Session":
+    """
+    Shared session: keeps the HTTPS connection to discord.com alive between
+    calls and retries rate limits (honouring Retry-After) and 5xx responses.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    session.mount(
+        "https://",
+        HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=frozenset({"POST"}),
+            ),
+        ),
+    )
+    return session
+
+
+@functools.lru_cache(maxsize=1)
+def _get_upload_session() -> "requests.Session":
+    """
+    Session for file uploads. Their streamed body cannot be rewound for a
+    retry, so this pool has no adapter-level retries.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    return session
+
+
+def _card_fields(kwargs: Dict) -> Dict:
+    """Strip `settings` from queued card kwargs, leaving embed fields."""
+    return {k: v for k, v in kwargs.items() if k != "settings"}
+
+
+def _build_embed(
+    story_id: int,
+    title: str,
+    url: str,
+    script: str,
+    keywords: List[str],
+    score: int,
+    subreddit: str,
+) -> Dict:
+    """Build the "Production Card" embed for one story."""
     # Truncate script if it exceeds Discord embed field limit (1024 chars)
     script_display = script if len(script) <= 1024 else script[:1020] + "…"
     keywords_display = ", ".join(keywords) if keywords else "—"
 
-    embed = {
+    return {
         "title": "🎬 Nouvelle histoire détectée",
         "color": _EMBED_COLOR,
         "fields": [
@@ -71,55 +261,117 @@ def send_story_card(
             },
         ],
         "footer": {
-            "text": f"mystery-story-bot • {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M UTC')}",
+            "text": _footer_text(),
         },
     }
 
-    payload = {"embeds": [embed]}
 
+def _footer_text() -> str:
+    """Return the embed footer for the current UTC minute (cached per minute)."""
+    global _footer_cache
+    minute = int(time.time()) // 60
+    if _footer_cache[0] != minute:
+        now = datetime.fromtimestamp(minute * 60, tz=timezone.utc)
+        _footer_cache = (minute, f"mystery-story-bot • {now:%Y-%m-%d %H:%M UTC}")
+    return _footer_cache[1]
+
+
+def _embed_size(embed: Dict) -> int:
+    """Characters Discord counts towards the per-message embed limit."""
+    size = len(embed.get("title", "")) + len(embed.get("footer", {}).get("text", ""))
+    for field in embed.get("fields", []):
+        size += len(field["name"]) + len(field["value"])
+    return size
+
+
+def _send_cards(settings: Settings, cards: List[Dict]) -> None:
+    """Send cards packed into as few webhook messages as Discord allows."""
+    story_ids: List[int] = []
+    embeds: List[Dict] = []
+    chars = 0
+    for card in cards:
+        embed = _build_embed(**card)
+        size = _embed_size(embed)
+        if embeds and (
+            len(embeds) == _MAX_EMBEDS_PER_MESSAGE
+            or chars + size > _MAX_EMBED_CHARS_PER_MESSAGE
+        ):
+            _post_embeds(settings, story_ids, embeds)
+            story_ids, embeds, chars = [], [], 0
+        story_ids.append(card["story_id"])
+        embeds.append(embed)
+        chars += size
+    if embeds:
+        _post_embeds(settings, story_ids, embeds)
+
+
+def _post_embeds(settings: Settings, story_ids: List[int], embeds: List[Dict]) -> bool:
+    """
+    Send one webhook message carrying `embeds`.
+    Returns True on success, False on failure.
+    """
+    import requests
+
+    ids_display = ", ".join(f"#{i}" for i in story_ids)
     try:
-        resp = requests.post(
+        resp = _get_session().post(
             settings.discord_webhook_url,
-            json=payload,
+            json={"embeds": embeds},
             timeout=15,
         )
         resp.raise_for_status()
-        logger.info("Discord card sent for story #%d", story_id)
+        logger.info("Discord card(s) sent for story %s", ids_display)
         return True
     except requests.exceptions.RequestException as exc:
-        logger.error("Failed to send Discord card for story #%d: %s", story_id, exc)
+        logger.error("Failed to send Discord card(s) for story %s: %s", ids_display, exc)
         return False
 
 
-def send_tts_file(
+def _send_tts_file_sync(
     settings: Settings,
     story_id: int,
     title: str,
     mp3_path: str,
     voice: str = "onyx",
+    file_bytes: Optional[bytes] = None,
 ) -> bool:
     """
-    Upload an MP3 file to Discord via the webhook.
+    Upload an MP3 file (or `file_bytes`) to Discord via the webhook.
     Returns True on success, False on failure.
     """
-    path = Path(mp3_path)
-    if not path.exists():
-        logger.error("MP3 file not found: %s", mp3_path)
-        return False
+    import requests
+    from requests_toolbelt.multipart.encoder import MultipartEncoder
 
+    path = Path(mp3_path)
     message = f"🎙️ Audio généré pour l'histoire **#{story_id}** — {title[:150]}\n🗣️ Voix : **{voice}**"
 
+    def _post(content) -> "requests.Response":
+        # Stream the multipart body instead of building it in memory
+        encoder = MultipartEncoder(
+            fields={
+                "content": message,
+                "file": (path.name, content, "audio/mpeg"),
+            }
+        )
+        return _get_upload_session().post(
+            settings.discord_webhook_url,
+            data=encoder,
+            headers={"Content-Type": encoder.content_type},
+            timeout=60,
+        )
+
     try:
-        with open(path, "rb") as f:
-            resp = requests.post(
-                settings.discord_webhook_url,
-                data={"content": message},
-                files={"file": (path.name, f, "audio/mpeg")},
-                timeout=60,
-            )
+        if file_bytes is not None:
+            resp = _post(file_bytes)
+        else:
+            with open(path, "rb") as f:
+                resp = _post(f)
         resp.raise_for_status()
         logger.info("Discord TTS file sent for story #%d", story_id)
         return True
+    except FileNotFoundError:
+        logger.error("MP3 file not found: %s", mp3_path)
+        return False
     except requests.exceptions.RequestException as exc:
         logger.error(
             "Failed to send TTS file to Discord for story #%d: %s",
@@ -1,77 +1,35 @@
 """
 Script generator — uses GPT-4o to produce narration scripts and visual keywords.
+Posts are first screened with gpt-4o-mini so GPT-4o only sees usable ones.
 """
 
-import json
+import functools
 import logging
-from typing import Tuple, List
+from importlib import resources
+from typing import TYPE_CHECKING, Dict, Tuple, List
 
-from openai import OpenAI
+import orjson
 
 from .config import Settings
 
+if TYPE_CHECKING:
+    # openai pulls in httpx/pydantic — imported lazily where it is used
+    from openai import AsyncOpenAI, OpenAI
+
 logger = logging.getLogger(__name__)
 
-_SYSTEM_PROMPT_TEMPLATE = """You are a narrator for a dark, atmospheric mystery short video channel.
-Given a Reddit post about an unsolved mystery, strange phenomenon, or dark real event, generate:
-
-STEP 1 — CHOOSE A UNIQUE SETTING (do this silently, it will appear in the JSON output):
-- Pick a country from Europe, Scandinavia, Eastern Europe, the Balkans, or the Baltic states.
-  Examples of valid countries: Norway, Finland, Hungary, Romania, Poland, Czech Republic, Estonia,
-  Iceland, Bulgaria, Lithuania, Latvia, Slovenia, Slovakia, Serbia, Croatia, Moldova, Albania,
-  Montenegro, North Macedonia, Bosnia, Kosovo, Belarus, Ukraine, Greece, Portugal, Austria, Switzerland,
-  Ireland, Scotland, Wales, and any other non-US, non-Canadian country you know well.
-- FORBIDDEN: United States, Canada, Australia, New Zealand. Never set the story there.
-- Pick a REAL small town or city (not the capital) in that country — population under 150,000.
-- Invent a protagonist with a full name (first + last) that sounds 100% authentic for that country.
-- Invent a secondary character (neighbor, colleague, local) with a different authentic name from the same country.
-- Each call MUST produce a different country and different names — never repeat the same combination.
-
-STEP 2 — WRITE THE STORY:
-1. A narration script in English, approximately {word_count} words (range: {min_words}–{max_words}).
-   Structure: attention-grabbing hook → key facts → eerie detail → cliffhanger or open-ended question.
-   Tone: calm, eerie, and factual — like a whispered documentary. No clickbait, no hype.
-   Language: Use simple, direct words. Avoid complex or fancy vocabulary that doesn't add to the mystery.
-   Ending: ALWAYS conclude with either:
-      - An open-ended question that makes the viewer wonder
-      - A cliffhanger that leaves them wanting more
-      - A mysterious statement that invites speculation
-   Do NOT mention Reddit, upvotes, or the source. Write as if telling a standalone story.
-
-   HOOK — CRITICAL RULE:
-   - NEVER start with "In the small town of", "In a small village", "In the quiet town", or any
-     variation that opens with a place description before the action.
-   - The very first sentence must create immediate emotion — dread, unease, confusion, or curiosity.
-   - Possible hook styles (vary each story):
-       • Drop straight into the strange event, no setup
-       • Open with a physical sensation: a sound, smell, or wrongness the protagonist can't explain
-       • Start mid-action, protagonist already in the middle of it
-       • Lead with a single haunting discovery, then pull back to explain how it got there
-       • Open with a neighbor or stranger reporting something before the protagonist realizes it concerns them
-       • Begin with the aftermath — something is already wrong when we arrive
-
-   NARRATIVE PERSONALIZATION:
-   - Use the protagonist and secondary character names you invented in STEP 1.
-   - CRITICAL: Build a pattern of MULTIPLE recurring events, not a single isolated incident:
-     * At least 2-3 similar strange occurrences to the same person or in the same place
-     * Add temporal progression ("First it was X, then three days later Y, by Friday Z…")
-     * Reference other locals or past incidents to give the story history
-   - Replace ALL names from the original story with your invented names — no exceptions.
-   - For TRUE CRIME or UNSOLVED MYSTERIES: keep factual details, but still use your invented names
-     and location for the narrative frame.
-
-2. Exactly 5 to 6 visual keywords in English (single words or 2-word phrases) for video clip search.
-   Examples: "abandoned hospital", "fog", "night forest", "old photograph", "static noise", "empty hallway".
+# Narration prompt template ({word_count}/{min_words}/{max_words}), read once
+_SYSTEM_PROMPT_TEMPLATE = (
+    resources.files(__package__).joinpath("prompt.txt").read_text(encoding="utf-8").rstrip("\n")
+)
+
+_SCREEN_PROMPT = """You triage Reddit posts for a dark, atmospheric mystery short video channel.
+Rate how well the post could be turned into a 30-second eerie narration:
+a strange event, an unsolved mystery, or a dark real story with concrete details.
+Low scores for questions, discussions, meta posts, link dumps, or thin content.
 
 Respond ONLY with valid JSON in this exact format:
-{{
-  "country": "The country you chose",
-  "city": "The town or city you chose",
-  "protagonist": "Full name of the protagonist",
-  "secondary": "Full name of the secondary character",
-  "script": "Your narration script here...",
-  "keywords": ["keyword1", "keyword2", "keyword3", "keyword4", "keyword5"]
-}}"""
+{"score": <integer from 0 to 10>}"""
 
 _USER_TEMPLATE = """Title: {title}
 
@@ -79,57 +37,59 @@ Content:
 {selftext}"""
 
 
-def generate_script(
-    settings: Settings,
-    title: str,
-    selftext: str,
-) -> Tuple[str, List[str]]:
-    """
-    Generate a narration script and visual keywords from a Reddit post.
+@functools.lru_cache(maxsize=4)
+def _get_client(api_key: str) -> "OpenAI":
+    """Return a shared OpenAI client so its connection pool is reused."""
+    from openai import OpenAI
 
-    Returns:
-        (script_text, keywords_list)
+    return OpenAI(api_key=api_key)
+
+
+@functools.lru_cache(maxsize=8)
+def _build_system_prompt(target_words: int) -> str:
+    """Format the system prompt for a target word count (range: ±15%)."""
+    return _SYSTEM_PROMPT_TEMPLATE.format(
+        word_count=target_words,
+        min_words=int(target_words * 0.85),
+        max_words=int(target_words * 1.15),
+    )
 
-    Raises:
-        ValueError: if GPT response cannot be parsed or is out of spec.
-        openai.APIError: on API failures.
-    """
-    client = OpenAI(api_key=settings.openai_api_key)
 
+def _build_request(settings: Settings, title: str, selftext: str) -> Dict:
+    """Build the chat.completions.create keyword arguments for a post."""
     # Truncate very long posts to save tokens (keep first ~3000 chars)
-    truncated = selftext[:3000] if len(selftext) > 3000 else selftext
+    truncated = selftext[:3000]
 
     user_message = _USER_TEMPLATE.format(title=title, selftext=truncated)
 
-    # Calculate word count range (±15%)
+    # Identical across a run, which also keeps OpenAI's prompt-prefix cache warm
     target_words = settings.story_word_count
-    min_words = int(target_words * 0.85)
-    max_words = int(target_words * 1.15)
-
-    system_prompt = _SYSTEM_PROMPT_TEMPLATE.format(
-        word_count=target_words,
-        min_words=min_words,
-        max_words=max_words,
-    )
+    system_prompt = _build_system_prompt(target_words)
 
     logger.info("Generating script for: %s (target: %d words)", title[:80], target_words)
 
-    response = client.chat.completions.create(
-        model="gpt-4o",
-        messages=[
+    return {
+        "model": "gpt-4o",
+        "messages": [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_message},
         ],
-        response_format={"type": "json_object"},
-        temperature=0.9,
-        max_tokens=600,
-    )
+        "response_format": {"type": "json_object"},
+        "temperature": 0.9,
+        "max_tokens": 600,
+    }
 
-    raw_content = response.choices[0].message.content
+
+def _parse_response(
+    settings: Settings,
+    title: str,
+    raw_content: str | None,
+) -> Tuple[str, List[str]]:
+    """Validate the GPT JSON answer and return (script_text, keywords_list)."""
     if not raw_content:
         raise ValueError("GPT-4o returned an empty response")
 
-    data = json.loads(raw_content)
+    data = orjson.loads(raw_content)
 
     script = data.get("script", "").strip()
     keywords = data.get("keywords", [])
@@ -162,3 +122,111 @@ def generate_script(
 
     logger.info("Script generated: %d words, %d keywords", word_count, len(keywords))
     return script, keywords
+
+
+def _build_screen_request(title: str, selftext: str) -> Dict:
+    """Build the chat.completions.create keyword arguments for screening."""
+    # The gist is enough to judge a post — keep the cheap call cheap
+    user_message = _USER_TEMPLATE.format(title=title, selftext=selftext[:1500])
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": _SCREEN_PROMPT},
+            {"role": "user", "content": user_message},
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": 0,
+        "max_tokens": 20,
+    }
+
+
+def _parse_screen_response(
+    settings: Settings,
+    title: str,
+    raw_content: str | None,
+) -> bool:
+    """Return True if the post should go on to full generation."""
+    try:
+        score = int(orjson.loads(raw_content or "")["score"])
+    except (ValueError, KeyError, TypeError) as exc:
+        # Fail open: a broken screening answer must not drop a story
+        logger.warning("Unreadable screening answer for %s: %s", title[:60], exc)
+        return True
+
+    accepted = score >= settings.screen_min_score
+    logger.info(
+        "Screening %s (score %d/10, min %d): %s",
+        "passed" if accepted else "rejected",
+        score, settings.screen_min_score, title[:60],
+    )
+    return accepted
+
+
+def screen_post(settings: Settings, title: str, selftext: str) -> bool:
+    """
+    Ask gpt-4o-mini whether a post is worth a full GPT-4o generation.
+
+    Raises:
+        openai.APIError: on API failures.
+    """
+    client = _get_client(settings.openai_api_key)
+    response = client.chat.completions.create(**_build_screen_request(title, selftext))
+    return _parse_screen_response(settings, title, response.choices[0].message.content)
+
+
+async def screen_post_async(
+    settings: Settings,
+    title: str,
+    selftext: str,
+    client: "AsyncOpenAI",
+) -> bool:
+    """Async variant of `screen_post` using a caller-provided client."""
+    response = await client.chat.completions.create(**_build_screen_request(title, selftext))
+    return _parse_screen_response(settings, title, response.choices[0].message.content)
+
+
+def generate_script(
+    settings: Settings,
+    title: str,
+    selftext: str,
+) -> Tuple[str, List[str]]:
+    """
+    Generate a narration script and visual keywords from a Reddit post.
+
+    Returns:
+        (script_text, keywords_list)
+
+    Raises:
+        ValueError: if GPT response cannot be parsed or is out of spec.
+        openai.APIError: on API failures.
+    """
+    client = _get_client(settings.openai_api_key)
+    response = client.chat.completions.create(
+        **_build_request(settings, title, selftext)
+    )
+    return _parse_response(settings, title, response.choices[0].message.content)
+
+
+async def generate_script_async(
+    settings: Settings,
+    title: str,
+    selftext: str,
+    client: "AsyncOpenAI | None" = None,
+) -> Tuple[str, List[str]]:
+    """
+    Async variant of `generate_script`, so several posts can be generated
+    concurrently (e.g. with asyncio.gather).
+
+    Pass a shared `client` when fanning out; an AsyncOpenAI client is tied to
+    the event loop that uses it, so one is created per call otherwise.
+    """
+    if client is None:
+        from openai import AsyncOpenAI
+
+        async with AsyncOpenAI(api_key=settings.openai_api_key) as own_client:
+            return await generate_script_async(settings, title, selftext, own_client)
+
+    response = await client.chat.completions.create(
+        **_build_request(settings, title, selftext)
+    )
+    return _parse_response(settings, title, response.choices[0].message.content)
@@ -3,19 +3,25 @@ Main orchestrator — scrape → generate → store → notify.
 Run with: python -m src.main
 """
 
+import asyncio
 import logging
 import random
 import sys
 from collections import defaultdict
-from itertools import cycle
-from typing import List, Dict
+from itertools import islice, zip_longest
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 
 from .config import load_settings, Settings
-from .db import init_db, insert_story
-from .scraper import scrape_subreddit
-from .generator import generate_script
-from .discord_notify import send_story_card
-from .tts import generate_tts_for_story
+from .db import (
+    connect, init_db, insert_stories_if_new, all_reddit_ids, close_all,
+    mark_rejected, rejected_reddit_ids,
+)
+
+# The scraper, generator, Discord and TTS modules (and openai/aiohttp/
+# requests behind them) are imported where used, so a run that fails
+# settings validation exits before paying for them.
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 # ---------------------------------------------------------------------------
 # Logging
@@ -27,6 +33,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# OpenAI generation / speech requests in flight at once (rate limits)
+_MAX_PARALLEL_STORIES = 4
+
 
 def _validate_settings(settings: Settings) -> None:
     """Abort early if critical keys are missing."""
@@ -44,16 +53,147 @@ def _validate_settings(settings: Settings) -> None:
         sys.exit(1)
 
 
+async def _generate_one(
+    semaphore: asyncio.Semaphore,
+    client: "AsyncOpenAI",
+    settings: Settings,
+    post: Dict,
+):
+    """Screen a post with gpt-4o-mini, then generate it with GPT-4o (None if rejected)."""
+    from .generator import generate_script_async, screen_post_async
+
+    async with semaphore:
+        if not await screen_post_async(settings, post["title"], post["selftext"], client):
+            return None
+        return await generate_script_async(
+            settings, post["title"], post["selftext"], client=client,
+        )
+
+
+async def _generate_scripts(
+    settings: Settings,
+    pool: List[Dict],
+) -> Tuple[List[Tuple[Dict, object]], List[Dict]]:
+    """
+    Screen and generate scripts for posts taken from `pool` in order, until
+    max_stories_per_run have passed screening or the pool runs out. Each
+    wave runs concurrently and is sized to the slots still open, so posts
+    rejected by screening are back-filled from the rest of the pool.
+
+    Returns ((post, (script, keywords) or exception) for every post that
+    passed screening or failed, and the posts rejected by screening.
+    """
+    from openai import AsyncOpenAI
+
+    semaphore = asyncio.Semaphore(_MAX_PARALLEL_STORIES)
+    results: List[Tuple[Dict, object]] = []
+    rejected: List[Dict] = []
+    remaining = iter(pool)
+    async with AsyncOpenAI(api_key=settings.openai_api_key) as client:
+        while True:
+            wave = list(islice(remaining, settings.max_stories_per_run - len(results)))
+            if not wave:
+                break
+            outcomes = await asyncio.gather(
+                *(_generate_one(semaphore, client, settings, post) for post in wave),
+                return_exceptions=True,
+            )
+            for post, outcome in zip(wave, outcomes):
+                if outcome is None:
+                    rejected.append(post)
+                else:
+                    results.append((post, outcome))
+    return results, rejected
+
+
+def _story_card(g: Dict, story_id: int) -> Dict:
+    """Discord card for a stored story."""
+    post = g["post"]
+    return {
+        "story_id": story_id,
+        "title": post["title"],
+        "url": post["url"],
+        "script": g["story_data"]["script"],
+        "keywords": g["story_data"]["keywords"],
+        "score": post["score"],
+        "subreddit": post["subreddit"],
+    }
+
+
+async def _process_story(
+    semaphore: asyncio.Semaphore,
+    tts_client: "AsyncOpenAI",
+    settings: Settings,
+    g: Dict,
+    story_id: int,
+) -> None:
+    """
+    Generate the TTS audio for a stored story. `semaphore` caps speech
+    requests across all stories (each story's chunks share it).
+    """
+    from .tts import generate_tts_for_story_async
+
+    story_data = g["story_data"]
+
+    try:
+        await generate_tts_for_story_async(
+            settings=settings,
+            story_id=story_id,
+            title=story_data["title"],
+            script=story_data["script"],
+            voice=random.choice(["onyx", "echo", "fable"]),
+            client=tts_client,
+            semaphore=semaphore,
+        )
+    except Exception as tts_exc:
+        logger.error(
+            "TTS failed for story #%d: %s", story_id, tts_exc,
+        )
+
+
+async def _process_stories(settings: Settings, stored: List) -> List:
+    """
+    Run `_process_story` for every (generated, story_id) pair concurrently.
+    Returns None or the exception raised, per story, in order.
+    """
+    from .tts import new_tts_client
+
+    semaphore = asyncio.Semaphore(_MAX_PARALLEL_STORIES)
+    async with new_tts_client(settings.openai_api_key) as tts_client:
+        return await asyncio.gather(
+            *(
+                _process_story(semaphore, tts_client, settings, g, story_id)
+                for g, story_id in stored
+            ),
+            return_exceptions=True,
+        )
+
+
 def run() -> None:
-    """Execute the full pipeline."""
+    """
+    Execute the full pipeline. Owns the database connection: it is opened
+    (WAL, tuned pragmas) before any work and closed when the run ends.
+    """
     settings = load_settings()
     _validate_settings(settings)
 
+    connect(settings.db_path)
+    try:
+        _run_pipeline(settings)
+    finally:
+        close_all()
+
+
+def _run_pipeline(settings: Settings) -> None:
+    """Scrape → generate → store → notify, on the connection `run` opened."""
+    from .scraper import scrape_subreddits
+    from .discord_notify import send_story_cards, flush
+
     logger.info("=== mystery-story-bot starting ===")
     # Pick a random subset of subreddits for this run (rotation)
-    all_subs = list(settings.subreddits)
-    random.shuffle(all_subs)
-    active_subs = all_subs[: settings.subs_per_run]
+    active_subs = random.sample(
+        settings.subreddits, min(settings.subs_per_run, len(settings.subreddits))
+    )
 
     logger.info(
         "Config: subs_this_run=%s (%d/%d), score=%d–%d, max_per_run=%d",
@@ -65,21 +205,26 @@ def run() -> None:
         settings.max_stories_per_run,
     )
 
-    # 1. Init database
+    # 1. Init the schema and load known reddit_ids (stored or rejected by
+    #    screening) once for deduplication
     init_db(settings.db_path)
+    known_ids = all_reddit_ids(settings.db_path)
+    known_ids |= rejected_reddit_ids(settings.db_path)
 
-    # 2. Scrape selected subreddits
+    # 2. Scrape selected subreddits (concurrently)
     posts_by_sub: defaultdict[str, List[Dict]] = defaultdict(list)
     total_candidates = 0
-    for sub in active_subs:
-        try:
-            posts = scrape_subreddit(settings, sub)
-            random.shuffle(posts)  # randomize within each sub
-            posts_by_sub[sub] = posts
-            total_candidates += len(posts)
-            logger.info("r/%s: %d candidates ready", sub, len(posts))
-        except Exception as exc:
-            logger.error("Error scraping r/%s: %s", sub, exc, exc_info=True)
+    scraped = asyncio.run(scrape_subreddits(settings, active_subs, known_ids))
+    for sub, result in zip(active_subs, scraped):
+        if isinstance(result, Exception):
+            logger.error("Error scraping r/%s: %s", sub, result, exc_info=result)
+            continue
+        posts = result
+        # Randomize within each sub; the whole list stays in the pool so
+        # screening rejections can be back-filled
+        posts_by_sub[sub] = random.sample(posts, len(posts))
+        total_candidates += len(posts)
+        logger.info("r/%s: %d candidates ready", sub, len(posts))
 
     logger.info("Total new candidates across all subreddits: %d", total_candidates)
 
@@ -87,114 +232,93 @@ def run() -> None:
         logger.info("No new stories found. Exiting.")
         return
 
-    # 3. Round-robin selection across subreddits for diversity
-    #    Picks one story from each sub in turn until we hit the cap.
-    candidates: List[Dict] = []
-    iterators = {sub: iter(posts) for sub, posts in posts_by_sub.items() if posts}
-    sub_cycle = cycle(list(iterators.keys()))
-    exhausted: set = set()
-
-    while len(candidates) < settings.max_stories_per_run and len(exhausted) < len(iterators):
-        sub = next(sub_cycle)
-        if sub in exhausted:
-            continue
-        try:
-            post = next(iterators[sub])
-            candidates.append(post)
-        except StopIteration:
-            exhausted.add(sub)
+    # 3. Round-robin order across subreddits for diversity: one story from
+    #    each sub in turn. Screening walks this pool until the cap is hit.
+    sub_posts = [posts for posts in posts_by_sub.values() if posts]
+    pool: List[Dict] = [
+        post for row in zip_longest(*sub_posts) for post in row if post is not None
+    ]
 
     logger.info(
-        "Processing %d stories (capped at %d, round-robin across %d subs)",
-        len(candidates), settings.max_stories_per_run, len(iterators),
+        "Screening up to %d of %d candidates (round-robin across %d subs)",
+        settings.max_stories_per_run, len(pool), len(sub_posts),
     )
 
-    # 4. Generate scripts, store, notify
+    # 4. Screen and generate scripts (concurrently)
     processed = 0
     errors = 0
+    generated: List[Dict] = []
 
-    for idx, post in enumerate(candidates):
-        try:
-            # Alternate: every other story is multi-part (3 episodes)
-            multi_part = (idx % 2 == 1)
+    results, rejected = asyncio.run(_generate_scripts(settings, pool))
+    skipped = len(rejected)
+    try:
+        mark_rejected(settings.db_path, [p["reddit_id"] for p in rejected])
+    except Exception as exc:
+        logger.error("Failed to record %d rejected posts: %s", len(rejected), exc)
 
-            # Generate script via GPT-4o
-            script_parts, keywords = generate_script(
-                settings, post["title"], post["selftext"],
-                multi_part=multi_part,
+    for post, result in results:
+        if isinstance(result, Exception):
+            logger.error(
+                "Error generating script for '%s': %s",
+                post["title"][:60], result, exc_info=result,
             )
+            errors += 1
+            continue
 
-            # For DB storage, join parts with separator or store single script
-            script_for_db = "\n\n---PART---\n\n".join(script_parts)
-
-            # Store in database
-            story_data = {
+        script, keywords = result
+        generated.append({
+            "post": post,
+            "story_data": {
                 **post,
-                "script": script_for_db,
+                "script": script,
                 "keywords": keywords,
-            }
-            story_id = insert_story(settings.db_path, story_data)
-            logger.info("Story #%d saved (%s): %s",
-                        story_id,
-                        f"{len(script_parts)}-part" if multi_part else "single",
-                        post["title"][:60])
-
-            # Notify on Discord — one card per part for multi-part stories
-            if multi_part:
-                for part_idx, part_script in enumerate(script_parts):
-                    send_story_card(
-                        settings=settings,
-                        story_id=story_id,
-                        title=f"{post['title']} (Part {part_idx + 1}/{len(script_parts)})",
-                        url=post["url"],
-                        script=part_script,
-                        keywords=keywords,
-                        score=post["score"],
-                        subreddit=post["subreddit"],
-                    )
-            else:
-                send_story_card(
-                    settings=settings,
-                    story_id=story_id,
-                    title=post["title"],
-                    url=post["url"],
-                    script=script_for_db,
-                    keywords=keywords,
-                    score=post["score"],
-                    subreddit=post["subreddit"],
-                )
-
-            # Generate TTS audio — one file per part, same voice throughout
-            try:
-                # Pick voice once for all parts
-                voice = random.choice(["onyx", "echo", "fable"])
-                for part_idx, part_script in enumerate(script_parts):
-                    part_num = (part_idx + 1) if multi_part else None
-                    generate_tts_for_story(
-                        settings=settings,
-                        story_id=story_id,
-                        title=post["title"],
-                        script=part_script,
-                        voice=voice,
-                        part=part_num,
-                    )
-            except Exception as tts_exc:
-                logger.error(
-                    "TTS failed for story #%d: %s", story_id, tts_exc,
-                )
+            },
+        })
 
-            processed += 1
+    # 5. Store all generated stories in a single transaction
+    #    (a story stored meanwhile by another run comes back as None)
+    story_ids: List[Optional[int]] = []
+    try:
+        story_ids = insert_stories_if_new(
+            settings.db_path, [g["story_data"] for g in generated]
+        )
+    except Exception as exc:
+        logger.error("Failed to save %d stories: %s", len(generated), exc, exc_info=True)
+        errors += len(generated)
 
-        except Exception as exc:
+    # 6. Notify on Discord (all cards batched), then generate TTS
+    #    (stories in parallel)
+    stored = []
+    cards: List[Dict] = []
+    for g, story_id in zip(generated, story_ids):
+        if story_id is None:
+            logger.info("Already stored, skipping: %s", g["post"]["title"][:60])
+            skipped += 1
+            continue
+        logger.info("Story #%d saved: %s", story_id, g["post"]["title"][:60])
+        stored.append((g, story_id))
+        cards.append(_story_card(g, story_id))
+
+    send_story_cards(settings, cards)
+
+    outcomes = asyncio.run(_process_stories(settings, stored))
+    for (g, _), outcome in zip(stored, outcomes):
+        if isinstance(outcome, Exception):
             logger.error(
                 "Error processing post '%s': %s",
-                post["title"][:60], exc, exc_info=True,
+                g["post"]["title"][:60], outcome, exc_info=outcome,
             )
             errors += 1
+        else:
+            processed += 1
+
+    # Wait for queued Discord notifications to go out
+    if not flush(timeout=300):
+        logger.warning("Timed out waiting for Discord notifications to be sent")
 
     logger.info(
-        "=== Done: %d processed, %d errors, %d total candidates ===",
-        processed, errors, total_candidates,
+        "=== Done: %d processed, %d skipped, %d errors, %d total candidates ===",
+        processed, skipped, errors, total_candidates,
     )
 
 
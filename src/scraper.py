@@ -1,18 +1,20 @@
 """
 Reddit scraper — fetches subreddit feeds via Reddit public JSON API,
 uses Bright Data for individual post pages when needed.
+All feeds of all subreddits are fetched concurrently (asyncio + aiohttp).
 """
 
-import json
+import asyncio
+import functools
 import logging
+import random
 import time
-from datetime import datetime, timezone
-from typing import Dict, List
+from typing import AbstractSet, Dict, List, Optional, Set
 
-import requests
+import aiohttp
+import orjson
 
 from .config import Settings
-from .db import story_exists
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +27,11 @@ _FEEDS = [
 
 _USER_AGENT = "mystery-story-bot/1.0 (educational project)"
 
+# Attempts per feed; each request gets an equal share of the feed deadline
+_FETCH_ATTEMPTS = 3
 
+
+@functools.lru_cache(maxsize=256)
 def _build_reddit_url(subreddit: str, sort: str, time_filter: str | None, limit: int = 50) -> str:
     """Build a Reddit .json URL for the given subreddit and sort parameters."""
     url = f"https://www.reddit.com/r/{subreddit}/{sort}.json?limit={limit}"
@@ -36,144 +42,203 @@ def _build_reddit_url(subreddit: str, sort: str, time_filter: str | None, limit:
     return url
 
 
-def _fetch_reddit_json(
+async def _fetch_reddit_json(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
     target_url: str,
-    max_retries: int = 3,
+    deadline_s: float,
+    max_retries: int = _FETCH_ATTEMPTS,
 ) -> dict | None:
     """
     Fetch a Reddit JSON feed directly (public API).
-    Retries with exponential backoff on failure.
-    """
-    headers = {"User-Agent": _USER_AGENT}
+    Retries with exponential backoff on failure; `semaphore` caps the number
+    of requests in flight across all feeds.
 
+    All attempts share a `deadline_s` budget, so one dead feed can't hold up
+    the run. It starts once the feed first gets a request slot: time spent
+    queued behind other feeds doesn't count.
+    """
+    loop = asyncio.get_running_loop()
+    deadline: float | None = None
     for attempt in range(1, max_retries + 1):
+        raw = b""
         try:
             logger.info(
                 "Reddit request (attempt %d/%d): %s",
                 attempt, max_retries, target_url,
             )
-            resp = requests.get(
-                target_url,
-                headers=headers,
-                timeout=30,
-            )
-            resp.raise_for_status()
+            async with semaphore:
+                if deadline is None:
+                    deadline = loop.time() + deadline_s
+                async with asyncio.timeout_at(deadline):
+                    async with session.get(target_url) as resp:
+                        resp.raise_for_status()
+                        # Parse the raw bytes: no charset sniffing or str copy
+                        raw = await resp.read()
+                        status = resp.status
 
-            body = resp.text.strip()
-            if not body:
+            if not raw or not raw.strip():
                 logger.warning(
                     "Reddit returned empty body on attempt %d (status=%d)",
-                    attempt, resp.status_code,
+                    attempt, status,
                 )
             else:
-                data = json.loads(body)
+                data = orjson.loads(raw)
                 return data
 
-        except requests.exceptions.HTTPError as exc:
-            status = exc.response.status_code if exc.response is not None else "?"
+        except aiohttp.ClientResponseError as exc:
             logger.warning(
-                "Reddit HTTP %s on attempt %d: %s", status, attempt, exc
+                "Reddit HTTP %s on attempt %d: %s", exc.status, attempt, exc
             )
             # 429 = rate limited — wait longer
-            if status == 429 and attempt < max_retries:
+            if exc.status == 429 and attempt < max_retries:
                 wait = 5 * attempt
+                if loop.time() + wait >= deadline:
+                    break
                 logger.info("Rate limited, waiting %ds…", wait)
-                time.sleep(wait)
+                await asyncio.sleep(wait)
                 continue
-        except requests.exceptions.RequestException as exc:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
             logger.warning(
                 "Reddit request error on attempt %d: %s", attempt, exc
             )
-        except json.JSONDecodeError as exc:
-            snippet = resp.text[:200] if resp else "(no response)"
+        except orjson.JSONDecodeError as exc:
             logger.warning(
                 "Failed to parse Reddit response as JSON on attempt %d: %s — body: %s",
-                attempt, exc, snippet,
+                attempt, exc, raw[:200].decode("utf-8", "replace"),
             )
 
         if attempt < max_retries:
-            wait = 2 ** attempt
-            logger.info("Retrying in %ds…", wait)
-            time.sleep(wait)
+            # Capped exponential backoff, jittered so concurrent feeds
+            # don't retry in lockstep
+            wait = min(8, 2 ** attempt) + random.random()
+            if loop.time() + wait >= deadline:
+                break
+            logger.info("Retrying in %.1fs…", wait)
+            await asyncio.sleep(wait)
+    else:
+        logger.error("All %d Reddit attempts failed for %s", max_retries, target_url)
+        return None
 
-    logger.error("All %d Reddit attempts failed for %s", max_retries, target_url)
+    logger.error(
+        "Reddit fetch gave up (%gs deadline would pass before the retry): %s",
+        deadline_s, target_url,
+    )
     return None
 
 
-def _parse_posts(raw_json: dict) -> List[Dict]:
-    """Extract relevant fields from Reddit listing JSON."""
+def _parse_posts(
+    raw_json: dict,
+    *,
+    min_score: int,
+    max_score: int,
+    min_selftext_len: int = 100,
+    skip_ids: AbstractSet[str] = frozenset(),
+    soft_cap: Optional[int] = None,
+) -> List[Dict]:
+    """
+    Extract relevant fields from Reddit listing JSON, keeping only posts
+    with a score in [min_score, max_score], enough selftext and an id not
+    in `skip_ids`. Stops once `soft_cap` posts have been kept.
+    """
     posts = []
     children = raw_json.get("data", {}).get("children", [])
     for child in children:
         d = child.get("data", {})
         if not d:
             continue
+
+        # Filter before building anything for the post
+        score = d.get("score", 0)
+        if not (min_score <= score <= max_score):
+            continue
+        selftext = d.get("selftext", "")
+        if not selftext or len(selftext.strip()) < min_selftext_len:
+            continue
+        reddit_id = d.get("id", "")
+        if reddit_id in skip_ids:
+            continue
+
         created_utc = d.get("created_utc")
         reddit_created = None
         if created_utc:
-            reddit_created = datetime.fromtimestamp(
-                created_utc, tz=timezone.utc
-            ).isoformat()
+            # Same output as datetime.isoformat() for whole-second UTC stamps
+            t = time.gmtime(int(created_utc))
+            reddit_created = (
+                f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}"
+                f"T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}+00:00"
+            )
 
         posts.append(
             {
-                "reddit_id": d.get("id", ""),
+                "reddit_id": reddit_id,
                 "subreddit": d.get("subreddit", ""),
                 "title": d.get("title", ""),
-                "selftext": d.get("selftext", ""),
-                "score": d.get("score", 0),
+                "selftext": selftext,
+                "score": score,
                 "url": f"https://www.reddit.com{d.get('permalink', '')}",
                 "reddit_created": reddit_created,
             }
         )
+        if soft_cap is not None and len(posts) >= soft_cap:
+            break
     return posts
 
 
-def scrape_subreddit(
+async def scrape_subreddit(
+    session: aiohttp.ClientSession,
+    semaphore: asyncio.Semaphore,
     settings: Settings,
     subreddit: str,
+    known_ids: Set[str],
 ) -> List[Dict]:
     """
     Scrape a subreddit and return new, filtered posts.
+    All feeds are fetched concurrently.
 
     Filtering:
-    - Score between min_score and max_score
-    - Non-empty selftext (we need textual content)
-    - Not already in the database (deduplication)
+    - Score between min_score and max_score (in `_parse_posts`)
+    - Non-empty selftext (we need textual content, in `_parse_posts`)
+    - Not in `known_ids` (stored stories, plus posts already returned this
+      run); accepted posts are added to it
     """
     all_new_posts: List[Dict] = []
-    seen_ids: set = set()
 
-    for sort, time_filter in _FEEDS:
-        target_url = _build_reddit_url(subreddit, sort, time_filter)
-        raw = _fetch_reddit_json(target_url)
+    raws = await asyncio.gather(
+        *(
+            _fetch_reddit_json(
+                session, semaphore,
+                _build_reddit_url(subreddit, sort, time_filter),
+                settings.fetch_deadline_s,
+            )
+            for sort, time_filter in _FEEDS
+        )
+    )
+
+    for (sort, time_filter), raw in zip(_FEEDS, raws):
         if raw is None:
             continue
 
-        posts = _parse_posts(raw)
+        # The round-robin never takes more than max_stories_per_run from
+        # one sub; 2x leaves room for the dedup below
+        posts = _parse_posts(
+            raw,
+            min_score=settings.min_score,
+            max_score=settings.max_score,
+            skip_ids=known_ids,
+            soft_cap=settings.max_stories_per_run * 2,
+        )
         logger.info(
-            "r/%s (%s/%s): retrieved %d posts",
+            "r/%s (%s/%s): retrieved %d eligible posts",
             subreddit, sort, time_filter or "-", len(posts),
         )
 
         for post in posts:
             rid = post["reddit_id"]
-            # Skip duplicates within this run
-            if rid in seen_ids:
-                continue
-            seen_ids.add(rid)
-
-            # Score filter
-            if not (settings.min_score <= post["score"] <= settings.max_score):
-                continue
-
-            # Must have textual content
-            if not post["selftext"] or len(post["selftext"].strip()) < 100:
-                continue
-
-            # Database deduplication
-            if story_exists(settings.db_path, rid):
+            # Stored, rejected, or already returned by a feed of this run
+            if rid in known_ids:
                 continue
+            known_ids.add(rid)
 
             all_new_posts.append(post)
 
@@ -181,3 +246,36 @@ def scrape_subreddit(
         "r/%s: %d new posts after filtering & dedup", subreddit, len(all_new_posts)
     )
     return all_new_posts
+
+
+async def scrape_subreddits(
+    settings: Settings,
+    subreddits: List[str],
+    known_ids: Set[str],
+) -> List[List[Dict] | BaseException]:
+    """
+    Scrape several subreddits concurrently over one HTTP session, with at
+    most `settings.max_concurrency` requests in flight.
+    `known_ids` is shared by all subreddits (see `scrape_subreddit`).
+    Returns one post list (or the exception raised) per subreddit, in order.
+    """
+    semaphore = asyncio.Semaphore(settings.max_concurrency)
+    # Pooled keep-alive connections and cached DNS; headers and timeout are
+    # set once here instead of on every request
+    connector = aiohttp.TCPConnector(limit=16, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(
+        connector=connector,
+        headers={"User-Agent": _USER_AGENT},
+        # Per request, well under the per-feed deadline so a timed-out
+        # attempt still leaves time to retry
+        timeout=aiohttp.ClientTimeout(
+            total=settings.fetch_deadline_s / _FETCH_ATTEMPTS
+        ),
+    ) as session:
+        return await asyncio.gather(
+            *(
+                scrape_subreddit(session, semaphore, settings, sub, known_ids)
+                for sub in subreddits
+            ),
+            return_exceptions=True,
+        )
@@ -1,19 +1,28 @@
 """
 Text-to-Speech CLI — generates MP3 from a stored script using OpenAI TTS.
+Long scripts are split into chunks synthesised in parallel, then joined.
 Usage: python -m src.tts --id 42
 """
 
 import argparse
+import asyncio
+import hashlib
 import logging
+import os
 import random
+import re
+import shutil
 import sys
 from pathlib import Path
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, List, Optional
 
 from .config import load_settings
-from .db import init_db, get_story, update_tts_path
-from .discord_notify import send_tts_file
+from .db import init_db, get_story, update_tts_path, close_all
+from .discord_notify import send_tts_file, flush
+
+if TYPE_CHECKING:
+    # openai (and httpx) are imported when a client is built
+    from openai import AsyncOpenAI
 
 logging.basicConfig(
     level=logging.INFO,
@@ -29,19 +38,155 @@ VOICES = ["onyx", "echo", "fable", "nova", "shimmer", "alloy"]
 MYSTERY_VOICES = ["onyx", "echo", "fable"]
 
 
-def generate_tts_for_story(
+# OpenAI TTS accepts up to 4096 input characters per request
+_TTS_CHUNK_CHARS = 2500
+# Concurrent speech requests (rate limits), unless the caller passes its
+# own semaphore to share across stories
+_TTS_CONCURRENCY = 4
+
+
+def new_tts_client(api_key: str) -> "AsyncOpenAI":
+    """Build an AsyncOpenAI client configured for TTS (share it across calls)."""
+    import httpx
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(
+        api_key=api_key,
+        max_retries=2,
+        # Long scripts can take minutes to synthesise
+        timeout=httpx.Timeout(300.0, connect=10.0),
+    )
+
+
+def _split_on_paragraph(script: str, max_chars: int = _TTS_CHUNK_CHARS) -> List[str]:
+    """
+    Split a script into chunks of at most `max_chars`, on paragraph
+    boundaries when possible, then sentences, then hard cuts.
+    """
+    chunks: List[str] = []
+    current = ""
+    for paragraph in (p.strip() for p in script.split("\n\n")):
+        if not paragraph:
+            continue
+        pieces = [paragraph]
+        if len(paragraph) > max_chars:
+            pieces = []
+            for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+                while len(sentence) > max_chars:
+                    pieces.append(sentence[:max_chars])
+                    sentence = sentence[max_chars:]
+                pieces.append(sentence)
+        for piece in pieces:
+            if current and len(current) + 2 + len(piece) > max_chars:
+                chunks.append(current)
+                current = piece
+            else:
+                current = f"{current}\n\n{piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+async def _synthesize(
+    client: "AsyncOpenAI",
+    voice: str,
+    script: str,
+    semaphore: asyncio.Semaphore,
+) -> bytes:
+    """
+    Synthesise `script` as MP3, requesting its chunks concurrently (at most
+    `semaphore` at a time) and concatenating them in order (MP3 frames from
+    the same encoder settings play back seamlessly when joined).
+    If a chunk fails, the other requests are cancelled.
+    """
+
+    async def synth(chunk: str) -> bytes:
+        async with semaphore:
+            async with client.audio.speech.with_streaming_response.create(
+                model="tts-1",
+                voice=voice,
+                input=chunk,
+                response_format="mp3",
+            ) as response:
+                return await response.read()
+
+    try:
+        async with asyncio.TaskGroup() as tg:
+            tasks = [tg.create_task(synth(c)) for c in _split_on_paragraph(script)]
+    except ExceptionGroup as eg:
+        raise eg.exceptions[0]
+    return b"".join(t.result() for t in tasks)
+
+
+def _cache_path(output_dir: Path, voice: str, script: str) -> Path:
+    """Audio cache entry for an exact (voice, script) pair."""
+    digest = hashlib.sha256(f"{voice}\x00{script}".encode("utf-8")).hexdigest()
+    return output_dir / "cache" / f"{digest}.mp3"
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link `src` to `dst` (copy if the filesystem can't), replacing `dst`."""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
+def _load_cached_audio(
+    settings, story_id: int, mp3_path: Path, cached: Path,
+) -> Optional[bytes]:
+    """
+    On a cache hit, place the cached MP3 at `mp3_path`, record it in the
+    database and return its bytes. Returns None on a miss.
+    """
+    if not cached.exists():
+        return None
+    _link_or_copy(cached, mp3_path)
+    logger.info("TTS cache hit — MP3 linked to %s", mp3_path)
+    update_tts_path(settings.db_path, story_id, str(mp3_path))
+    return cached.read_bytes()
+
+
+def _store_audio(
+    settings, story_id: int, mp3_path: Path, audio: bytes, cached: Path,
+) -> None:
+    """Write the MP3 to disk, add it to the cache and record its path in the database."""
+    # A previous run may have left a hard link into the cache here:
+    # unlink rather than truncate so the cached copy stays intact
+    mp3_path.unlink(missing_ok=True)
+    mp3_path.write_bytes(audio)
+    logger.info("MP3 saved to %s", mp3_path)
+    cached.parent.mkdir(exist_ok=True)
+    _link_or_copy(mp3_path, cached)
+    update_tts_path(settings.db_path, story_id, str(mp3_path))
+
+
+async def generate_tts_for_story_async(
     settings,
     story_id: int,
     title: str,
     script: str,
     voice: str | None = None,
     part: int | None = None,
+    client: "AsyncOpenAI | None" = None,
+    semaphore: asyncio.Semaphore | None = None,
 ) -> str | None:
     """
     Generate TTS for a story (or a single part of a multi-part story).
     Can be called directly from the pipeline (no DB lookup needed).
+    Pass a shared `client` and `semaphore` when generating several stories
+    in one event loop, so the concurrency cap covers all of them.
     Returns the MP3 path on success, None on failure.
     """
+    if client is None:
+        async with new_tts_client(settings.openai_api_key) as own_client:
+            return await generate_tts_for_story_async(
+                settings, story_id, title, script, voice, part, own_client, semaphore,
+            )
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(_TTS_CONCURRENCY)
+
     if voice is None or voice == "random":
         voice = random.choice(MYSTERY_VOICES)
         logger.info("Randomly selected voice: %s", voice)
@@ -49,7 +194,6 @@ def generate_tts_for_story(
     part_label = f" (part {part})" if part else ""
     logger.info("Generating TTS for story #%d%s (voice=%s): %s", story_id, part_label, voice, title[:60])
 
-    client = OpenAI(api_key=settings.openai_api_key)
     output_dir = Path(settings.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
@@ -58,23 +202,40 @@ def generate_tts_for_story(
     else:
         mp3_path = output_dir / f"story_{story_id}.mp3"
 
-    with client.audio.speech.with_streaming_response.create(
-        model="tts-1",
-        voice=voice,
-        input=script,
-        response_format="mp3",
-    ) as response:
-        response.stream_to_file(str(mp3_path))
-    logger.info("MP3 saved to %s", mp3_path)
-
-    update_tts_path(settings.db_path, story_id, str(mp3_path))
+    # Identical script + voice (re-runs, retries) reuses the earlier audio
+    cached = _cache_path(output_dir, voice, script)
+    audio = await asyncio.to_thread(
+        _load_cached_audio, settings, story_id, mp3_path, cached,
+    )
+    if audio is None:
+        audio = await _synthesize(client, voice, script, semaphore)
+        await asyncio.to_thread(
+            _store_audio, settings, story_id, mp3_path, audio, cached,
+        )
 
     if settings.discord_webhook_url:
-        send_tts_file(settings, story_id, title, str(mp3_path), voice=voice)
+        send_tts_file(
+            settings, story_id, title, str(mp3_path),
+            voice=voice, file_bytes=audio,
+        )
 
     return str(mp3_path)
 
 
+def generate_tts_for_story(
+    settings,
+    story_id: int,
+    title: str,
+    script: str,
+    voice: str | None = None,
+    part: int | None = None,
+) -> str | None:
+    """Blocking wrapper around `generate_tts_for_story_async`."""
+    return asyncio.run(
+        generate_tts_for_story_async(settings, story_id, title, script, voice, part)
+    )
+
+
 def generate_tts(story_id: int, voice: str | None = None) -> None:
     """Generate an MP3 for the given story ID (CLI entrypoint)."""
     # Pick a random mystery voice if none specified
@@ -106,6 +267,10 @@ def generate_tts(story_id: int, voice: str | None = None) -> None:
     if mp3_path:
         logger.info("✅ Done! MP3 for story #%d saved to %s", story_id, mp3_path)
 
+    # Wait for the queued Discord upload to go out
+    if not flush(timeout=120):
+        logger.warning("Timed out waiting for the Discord upload to finish")
+
 
 def main() -> None:
     parser = argparse.ArgumentParser(
@@ -125,7 +290,10 @@ def main() -> None:
         help=f"OpenAI TTS voice. 'random' picks from {', '.join(MYSTERY_VOICES)} (default: random)",
     )
     args = parser.parse_args()
-    generate_tts(args.id, args.voice)
+    try:
+        generate_tts(args.id, args.voice)
+    finally:
+        close_all()
 
 
 if __name__ == "__main__":